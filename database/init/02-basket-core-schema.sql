@@ -103,6 +103,8 @@ CREATE INDEX idx_constituents_symbol ON basket_constituents(symbol);
 CREATE INDEX idx_constituents_sector ON basket_constituents(sector);
 CREATE INDEX idx_constituents_country ON basket_constituents(country);
 CREATE INDEX idx_constituents_is_active ON basket_constituents(is_active);
+-- Covering index for per-basket sector/weight aggregation over active constituents
+CREATE INDEX idx_constituents_active_basket ON basket_constituents(is_active, basket_id) INCLUDE (sector, weight);
 
 -- Create views for common queries
 CREATE VIEW active_baskets AS
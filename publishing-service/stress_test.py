@@ -2,155 +2,513 @@
 """
 Stress Testing Script for Publishing Service
 Tests service limits under extreme load conditions
+
+Requires aiohttp with its C extensions (install aiohttp[speedups] for aiodns), numpy and orjson;
+uses uvloop for the event loop when it is installed.
 """
 
+import argparse
 import asyncio
 import aiohttp
 import time
-import statistics
-import json
-from datetime import datetime
-from typing import List, Dict, Any
-import random
+import math
+import numpy as np
+import orjson
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List
+import re
+import socket
+from yarl import URL
+
+_SYMBOLS = ("AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "META", "NVDA", "NFLX", "AMD", "INTC")
+_SECTORS = ("Technology", "Healthcare", "Finance", "Consumer", "Energy")
+_MAX_CONSTITUENTS = 10
+_JSON_HEADERS = {"Content-Type": "application/json"}
+# Power of two so a basket id hash can be masked into a pool slot
+_BASKET_POOL_SIZE = 256
+
+# Endpoint indices drawn at once by each sustained-load worker
+_ENDPOINT_PICK_POOL = 1024
+
+# Bound on rows waiting for the JSON Lines writer; full queues apply backpressure to workers
+_ROW_QUEUE_SIZE = 10_000
+# Rows encoded per writer-thread hop; encoding holds the GIL, so small chunks keep each pause short
+_ROW_CHUNK_SIZE = 256
+
+# Log-linear latency histogram: 16 buckets per power of two of microseconds
+_HIST_BUCKETS = 4096
+_HIST_SUB_BUCKETS = 16
+# Runs at least this large keep only the histogram, not per-request arrays
+_RAW_SAMPLE_LIMIT = 10_000
+_PERCENTILES = {"median": 0.5, "p75": 0.75, "p90": 0.9, "p95": 0.95, "p99": 0.99, "p999": 0.999}
+
+def _latency_stats(values: np.ndarray) -> Dict[str, float]:
+    """Exact mean, min, max and percentiles from one O(n) partition instead of repeated sorts"""
+    n = values.size
+    if n == 0:
+        return {"avg": 0, "min": 0, "max": 0, **dict.fromkeys(_PERCENTILES, 0)}
+    lo, hi = (n - 1) // 2, n // 2
+    ranks = {name: min(int(q * n), n - 1) for name, q in _PERCENTILES.items() if name != "median"}
+    part = np.partition(values, sorted({lo, hi, *ranks.values()}))
+    stats = {
+        "avg": float(values.mean()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "median": float((part[lo] + part[hi]) / 2),
+    }
+    stats.update({name: float(part[k]) for name, k in ranks.items()})
+    return stats
+
+def _histogram_percentiles(histogram: np.ndarray, min_ms: float, max_ms: float) -> Dict[str, float]:
+    """Percentiles in milliseconds, interpolated within log-linear buckets from one cumulative sum
+    and clamped to the observed [min_ms, max_ms], which interpolation could otherwise overshoot"""
+    total = int(histogram.sum())
+    if total == 0:
+        return dict.fromkeys(_PERCENTILES, 0)
+    cumulative = np.cumsum(histogram)
+    result = {}
+    for name, q in _PERCENTILES.items():
+        target = q * total
+        i = int(np.searchsorted(cumulative, target))
+        below = cumulative[i] - histogram[i]
+        fraction = (target - below) / histogram[i]
+        lower_us = 2 ** (i / _HIST_SUB_BUCKETS) - 1
+        upper_us = 2 ** ((i + 1) / _HIST_SUB_BUCKETS) - 1
+        value_ms = float(lower_us + fraction * (upper_us - lower_us)) / 1000
+        result[name] = min(max(value_ms, min_ms), max_ms)
+    return result
+
+def _c_parser_active() -> bool:
+    """True when aiohttp parses responses with its llhttp-based C extension"""
+    return aiohttp.http_parser.HttpResponseParser.__module__.endswith("_http_parser")
+
+def _make_resolver():
+    """Non-blocking aiodns resolver, or None to fall back to aiohttp's threaded getaddrinfo"""
+    try:
+        return aiohttp.AsyncResolver()
+    except RuntimeError:
+        print("⚠️  aiodns is not installed; DNS lookups will use the thread pool")
+        return None
+
+class RequestSamples:
+    """Per-request measurements: an online latency histogram plus, for smaller runs, parallel typed arrays"""
+    
+    def __init__(self, size: int = 0, keep_raw: bool = True):
+        self.keep_raw = keep_raw
+        self.histogram = np.zeros(_HIST_BUCKETS, dtype=np.int64)
+        self.count = 0
+        self.successful = 0
+        self.success_sum_ns = 0
+        self.success_min_ns = 0
+        self.success_max_ns = 0
+        self.queue_sum_ns = 0
+        raw_size = size if keep_raw else 0
+        self.status_codes = array("i", bytes(4 * raw_size))
+        self.response_times_ns = array("q", bytes(8 * raw_size))
+        self.queue_times_ns = array("q", bytes(8 * raw_size))
+    
+    def __len__(self):
+        return self.count
+    
+    def _observe(self, status_code: int, response_time_ns: int, queue_time_ns: int):
+        """Update running aggregates and the histogram in O(1)"""
+        self.count += 1
+        self.queue_sum_ns += queue_time_ns
+        if 200 <= status_code < 300:
+            if self.successful == 0 or response_time_ns < self.success_min_ns:
+                self.success_min_ns = response_time_ns
+            if response_time_ns > self.success_max_ns:
+                self.success_max_ns = response_time_ns
+            self.successful += 1
+            self.success_sum_ns += response_time_ns
+            bucket = int(math.log2(response_time_ns / 1000 + 1) * _HIST_SUB_BUCKETS)
+            self.histogram[min(_HIST_BUCKETS - 1, bucket)] += 1
+    
+    def record(self, index: int, status_code: int, response_time_ns: int, queue_time_ns: int):
+        """Store one result in a preallocated slot"""
+        self._observe(status_code, response_time_ns, queue_time_ns)
+        if self.keep_raw:
+            self.status_codes[index] = status_code
+            self.response_times_ns[index] = response_time_ns
+            self.queue_times_ns[index] = queue_time_ns
+    
+    def append(self, status_code: int, response_time_ns: int, queue_time_ns: int):
+        """Store one result for runs whose request count is not known up front"""
+        self._observe(status_code, response_time_ns, queue_time_ns)
+        if self.keep_raw:
+            self.status_codes.append(status_code)
+            self.response_times_ns.append(response_time_ns)
+            self.queue_times_ns.append(queue_time_ns)
+    
+    def successful_response_times(self) -> np.ndarray:
+        """Response times of 2xx requests in milliseconds, converted once at report time"""
+        status = np.frombuffer(self.status_codes, dtype=np.int32)
+        response_times = np.frombuffer(self.response_times_ns, dtype=np.int64)
+        return response_times[(status >= 200) & (status < 300)] / 1e6
+    
+    def latency_stats(self) -> Dict[str, float]:
+        """Exact stats from the raw arrays when kept, otherwise histogram percentiles"""
+        if self.keep_raw:
+            return _latency_stats(self.successful_response_times())
+        if self.successful == 0:
+            return _latency_stats(np.empty(0))
+        min_ms, max_ms = self.success_min_ns / 1e6, self.success_max_ns / 1e6
+        return {
+            "avg": self.success_sum_ns / self.successful / 1e6,
+            "min": min_ms,
+            "max": max_ms,
+            **_histogram_percentiles(self.histogram, min_ms, max_ms),
+        }
+    
+    def avg_queue_time_ms(self) -> float:
+        """Mean wait on the work queue for a free worker, in milliseconds"""
+        return self.queue_sum_ns / self.count / 1e6 if self.count else 0
 
 class PublishingServiceStressTester:
-    def __init__(self, base_url: str = "http://localhost:8083"):
+    def __init__(self, base_url: str = "http://localhost:8083", hedge_delay_ms: float = None):
         self.base_url = base_url
+        self.hedge_delay_ms = hedge_delay_ms
         self.results = []
+        self._run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._session = None
+        self._url_cache = {}
+        self._rng = np.random.default_rng()
+        self._basket_pool = self._build_basket_pool(_BASKET_POOL_SIZE)
+    
+    async def __aenter__(self):
+        """Open one long-lived session shared by every test so pooled connections carry over"""
+        connector = aiohttp.TCPConnector(
+            limit=0,
+            limit_per_host=0,
+            keepalive_timeout=75,
+            resolver=_make_resolver(),
+            use_dns_cache=True,
+            ttl_dns_cache=300
+        )
+        self._session = aiohttp.ClientSession(connector=connector)
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._session.close()
+        self._session = None
+        
+    def _url(self, endpoint: str) -> URL:
+        """Resolve an endpoint to a prebuilt URL object so aiohttp skips parsing it per request"""
+        url = self._url_cache.get(endpoint)
+        if url is None:
+            url = self._url_cache[endpoint] = URL(self.base_url + endpoint)
+        return url
+    
+    async def _timed(self, send: Callable[[bytes], Awaitable[int]], data: bytes) -> tuple:
+        """Run one prebuilt sender and time it
         
-    async def make_request(self, session: aiohttp.ClientSession, endpoint: str, method: str = "GET", 
-                          data: Dict = None, headers: Dict = None) -> Dict[str, Any]:
-        """Make a single HTTP request and measure response time"""
-        start_time = time.time()
+        Returns (status_code, response_time_ns, error), where error is None on success. Times are
+        integer nanoseconds from the monotonic perf counter.
+        """
+        start_time = time.perf_counter_ns()
         
         try:
-            if method == "GET":
-                async with session.get(f"{self.base_url}{endpoint}", headers=headers) as response:
-                    response_text = await response.text()
-                    status_code = response.status
-            elif method == "POST":
-                async with session.post(f"{self.base_url}{endpoint}", 
-                                      json=data, headers=headers) as response:
-                    response_text = await response.text()
-                    status_code = response.status
-            else:
-                raise ValueError(f"Unsupported method: {method}")
-                
-            end_time = time.time()
-            response_time = (end_time - start_time) * 1000  # Convert to milliseconds
+            status_code = await send(data)
             
-            return {
-                "endpoint": endpoint,
-                "method": method,
-                "status_code": status_code,
-                "response_time_ms": response_time,
-                "success": 200 <= status_code < 300,
-                "timestamp": datetime.now().isoformat()
-            }
+            response_time = time.perf_counter_ns() - start_time
+            
+            return status_code, response_time, None
             
         except Exception as e:
-            end_time = time.time()
-            response_time = (end_time - start_time) * 1000
+            response_time = time.perf_counter_ns() - start_time
             
-            return {
+            return 0, response_time, str(e)
+    
+    def _sender(self, session: aiohttp.ClientSession, endpoint: str, method: str,
+                timeout: aiohttp.ClientTimeout, read_body: bool = False) -> Callable[[bytes], Awaitable[int]]:
+        """Build a send(data) coroutine function specialized for one endpoint and method
+        
+        URL, method, headers and hedging are resolved here once, so the per-request path has
+        no branching or lookups beyond the aiohttp call itself.
+        """
+        url = self._url(endpoint)
+        
+        if method == "GET" and self.hedge_delay_ms is not None:
+            async def send(data):
+                return await self._hedged_fetch(session, url, timeout, read_body)
+        elif method == "GET":
+            async def send(data):
+                async with session.get(url, timeout=timeout) as response:
+                    await (response.text() if read_body else response.read())
+                    return response.status
+        elif method == "POST":
+            async def send(data):
+                async with session.post(url, data=data, headers=_JSON_HEADERS, timeout=timeout) as response:
+                    await (response.text() if read_body else response.read())
+                    return response.status
+        else:
+            raise ValueError(f"Unsupported method: {method}")
+        
+        return send
+    
+    async def _fetch(self, session: aiohttp.ClientSession, method: str, url: URL, data: bytes,
+                     headers: Dict, timeout: aiohttp.ClientTimeout, read_body: bool) -> int:
+        """Send one request, consume its body and return the status code"""
+        async with session.request(method, url, data=data, headers=headers, timeout=timeout) as response:
+            if read_body:
+                await response.text()
+            else:
+                # Drain without decoding; releasing before EOF would close the connection
+                await response.read()
+            return response.status
+    
+    async def _hedged_fetch(self, session: aiohttp.ClientSession, url: URL,
+                            timeout: aiohttp.ClientTimeout, read_body: bool, upto: int = 2) -> int:
+        """GET with up to upto identical attempts, each fired hedge_delay_ms after the previous
+        one if nothing has succeeded yet (or at once if every attempt so far failed); the first
+        success wins and the rest are cancelled, and the last error is raised only if all fail"""
+        tasks = [asyncio.create_task(self._fetch(session, "GET", url, None, None, timeout, read_body))]
+        pending = set(tasks)
+        try:
+            while True:
+                wait_for = self.hedge_delay_ms / 1000 if len(tasks) < upto else None
+                done, pending = await asyncio.wait(pending, timeout=wait_for,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                # Read every finished attempt's outcome, even after a winner, so a failed sibling's
+                # exception is always retrieved
+                winner = None
+                for task in done:
+                    if task.exception() is None:
+                        winner = winner or task
+                    else:
+                        error = task.exception()
+                if winner is not None:
+                    return winner.result()
+                if len(tasks) < upto:
+                    task = asyncio.create_task(self._fetch(session, "GET", url, None, None, timeout, read_body))
+                    tasks.append(task)
+                    pending.add(task)
+                elif not pending:
+                    raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _responses_path(self, test_name: str) -> str:
+        """JSON Lines file that receives one row per request of a test"""
+        slug = re.sub(r"\W+", "_", test_name).strip("_").lower()
+        return f"stress_test_results_{self._run_id}_{slug}.jsonl"
+    
+    async def _write_rows(self, path: str, rows: asyncio.Queue, base_wall_ns: int, base_mono_ns: int):
+        """Append raw row tuples from rows to a JSON Lines file until a None sentinel arrives
+        
+        Workers only queue tuples stamped with a perf-counter completion time. Rows are taken off
+        the bounded queue in chunks of _ROW_CHUNK_SIZE and each chunk is formatted and written on a
+        worker thread, so memory stays bounded however long the test runs. The thread keeps the
+        file I/O off the loop, but encoding still holds the GIL; small chunks limit each stall of
+        the loop, and of tests still timing requests alongside, to well under a millisecond.
+        """
+        with open(path, "ab") as f:
+            chunk = []
+            while True:
+                row = await rows.get()
+                if row is not None:
+                    chunk.append(row)
+                if chunk and (row is None or len(chunk) >= _ROW_CHUNK_SIZE):
+                    await asyncio.to_thread(self._write_chunk, f, chunk, base_wall_ns, base_mono_ns)
+                    chunk = []
+                if row is None:
+                    return
+    
+    def _write_chunk(self, f, chunk: List[tuple], base_wall_ns: int, base_mono_ns: int):
+        """Derive each row's start offset and wall-clock timestamp, then write the chunk in one call"""
+        lines = []
+        for endpoint, method, status_code, response_time_ns, queue_time_ns, error, finished_ns in chunk:
+            start_ns_offset = finished_ns - response_time_ns - base_mono_ns
+            lines.append(orjson.dumps({
+                "timestamp": datetime.fromtimestamp((base_wall_ns + start_ns_offset) / 1e9, timezone.utc),
+                "start_ns_offset": start_ns_offset,
                 "endpoint": endpoint,
                 "method": method,
-                "status_code": 0,
-                "response_time_ms": response_time,
-                "success": False,
-                "error": str(e),
-                "timestamp": datetime.now().isoformat()
+                "status_code": status_code,
+                "response_time_ns": response_time_ns,
+                "queue_time_ns": queue_time_ns,
+                "error": error
+            }))
+        f.write(b"\n".join(lines) + b"\n")
+    
+    async def _worker(self, queue: asyncio.Queue, queued_at: int, samples: RequestSamples,
+                      exceptions: List[Exception], rows: asyncio.Queue):
+        """Take (index, send, endpoint, method, data) items off the queue until a None sentinel arrives
+        
+        Every item was queued at queued_at (perf-counter ns), so the time until a worker picks it up
+        is how long the request waited for a free virtual user.
+        """
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            index, send, endpoint, method, data = item
+            queue_time = time.perf_counter_ns() - queued_at
+            try:
+                status_code, response_time, error = await self._timed(send, data)
+                samples.record(index, status_code, response_time, queue_time)
+                await rows.put((endpoint, method, status_code, response_time, queue_time, error,
+                                time.perf_counter_ns()))
+            except Exception as e:
+                exceptions.append(e)
+    
+    async def _run_queue(self, session: aiohttp.ClientSession, items: List[tuple], concurrent_users: int,
+                         timeout: aiohttp.ClientTimeout, responses_path: str):
+        """Execute (endpoint, method, data) items with exactly concurrent_users long-lived workers,
+        streaming one row per request to responses_path while they run"""
+        # One specialized sender per (endpoint, method) pair, built before any request is queued
+        senders = {}
+        queue = asyncio.Queue()
+        for index, (endpoint, method, data) in enumerate(items):
+            send = senders.get((endpoint, method))
+            if send is None:
+                send = senders[endpoint, method] = self._sender(session, endpoint, method, timeout)
+            queue.put_nowait((index, send, endpoint, method, data))
+        for _ in range(concurrent_users):
+            queue.put_nowait(None)
+        queued_at = time.perf_counter_ns()
+        
+        # Concurrency is capped by the number of workers, not by the connector's pool limit
+        samples = RequestSamples(len(items), keep_raw=len(items) < _RAW_SAMPLE_LIMIT)
+        exceptions = []
+        rows = asyncio.Queue(maxsize=_ROW_QUEUE_SIZE)
+        base_wall_ns, base_mono_ns = time.time_ns(), time.perf_counter_ns()
+        writer = asyncio.create_task(self._write_rows(responses_path, rows, base_wall_ns, base_mono_ns))
+        await asyncio.gather(*(
+            self._worker(queue, queued_at, samples, exceptions, rows)
+            for _ in range(concurrent_users)
+        ))
+        await rows.put(None)
+        await writer
+        return samples, exceptions
+    
+    async def _sustained_worker(self, session: aiohttp.ClientSession,
+                                endpoints: List[tuple], deadline: int, timeout: aiohttp.ClientTimeout,
+                                samples: RequestSamples, exceptions: List[Exception], rows: asyncio.Queue):
+        """Keep one request in flight at a time until the perf-counter deadline (ns) passes
+        
+        Nothing waits on a queue here, so queue time is always recorded as zero.
+        """
+        targets = [(self._sender(session, endpoint, method, timeout), endpoint, method)
+                   for endpoint, method, _ in endpoints]
+        
+        # Endpoint picks come from a pre-drawn index pool, refilled when the pointer runs off the end
+        picks, pointer = [], 0
+        while time.perf_counter_ns() < deadline:
+            if pointer == len(picks):
+                picks, pointer = self._rng.integers(0, len(endpoints), size=_ENDPOINT_PICK_POOL).tolist(), 0
+            send, endpoint, method = targets[picks[pointer]]
+            pointer += 1
+            try:
+                status_code, response_time, error = await self._timed(send, None)
+                samples.append(status_code, response_time, 0)
+                await rows.put((endpoint, method, status_code, response_time, 0, error, time.perf_counter_ns()))
+            except Exception as e:
+                exceptions.append(e)
+    
+    def _build_basket_pool(self, size: int) -> List[Dict[str, Any]]:
+        """Prebuild basket templates from vectorized NumPy draws"""
+        counts = self._rng.integers(5, _MAX_CONSTITUENTS + 1, size=size)
+        symbol_idx = self._rng.integers(0, len(_SYMBOLS), size=(size, _MAX_CONSTITUENTS))
+        sector_idx = self._rng.integers(0, len(_SECTORS), size=(size, _MAX_CONSTITUENTS))
+        shares = self._rng.integers(100, 10001, size=(size, _MAX_CONSTITUENTS))
+        weights = self._rng.uniform(0.05, 0.25, size=(size, _MAX_CONSTITUENTS)).round(3)
+        
+        # Normalize weights to sum to 1.0 over each basket's active constituents
+        active = np.arange(_MAX_CONSTITUENTS) < counts[:, None]
+        weights = (weights / (weights * active).sum(axis=1, keepdims=True)).round(3)
+        
+        return [
+            {
+                # Identity fields are filled in per request by generate_basket_data
+                "basketId": None,
+                "basketCode": None,
+                "basketName": None,
+                "basketType": "EQUITY",
+                "baseCurrency": "USD",
+                "totalWeight": 1.0,
+                "constituents": [
+                    {
+                        "symbol": _SYMBOLS[syms[j]],
+                        "symbolName": f"{_SYMBOLS[syms[j]]} Corporation",
+                        "weight": wts[j],
+                        "shares": shrs[j],
+                        "sector": _SECTORS[sects[j]],
+                        "country": "US",
+                        "currency": "USD"
+                    }
+                    for j in range(count)
+                ]
             }
+            for count, syms, sects, shrs, wts in zip(
+                counts.tolist(), symbol_idx.tolist(), sector_idx.tolist(),
+                shares.tolist(), weights.tolist())
+        ]
     
     def generate_basket_data(self, basket_id: str) -> Dict[str, Any]:
-        """Generate realistic basket data for testing"""
-        symbols = ["AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "META", "NVDA", "NFLX", "AMD", "INTC"]
-        
-        constituents = []
-        total_weight = 0.0
-        
-        for i in range(random.randint(5, 10)):
-            symbol = random.choice(symbols)
-            weight = round(random.uniform(0.05, 0.25), 3)
-            total_weight += weight
-            
-            constituents.append({
-                "symbol": symbol,
-                "symbolName": f"{symbol} Corporation",
-                "weight": weight,
-                "shares": random.randint(100, 10000),
-                "sector": random.choice(["Technology", "Healthcare", "Finance", "Consumer", "Energy"]),
-                "country": "US",
-                "currency": "USD"
-            })
-        
-        # Normalize weights to sum to 1.0
-        for constituent in constituents:
-            constituent["weight"] = round(constituent["weight"] / total_weight, 3)
-        
-        return {
-            "basketId": basket_id,
-            "basketCode": f"STRESS_{basket_id}",
-            "basketName": f"Stress Test Basket {basket_id}",
-            "basketType": "EQUITY",
-            "baseCurrency": "USD",
-            "totalWeight": 1.0,
-            "constituents": constituents
-        }
+        """Generate realistic basket data for testing from the prebuilt pool"""
+        basket = self._basket_pool[hash(basket_id) & (_BASKET_POOL_SIZE - 1)].copy()
+        basket["basketId"] = basket_id
+        basket["basketCode"] = f"STRESS_{basket_id}"
+        basket["basketName"] = f"Stress Test Basket {basket_id}"
+        return basket
     
     async def run_stress_test(self, endpoint: str, method: str = "GET", 
                              concurrent_users: int = 50, total_requests: int = 1000,
                              data_generator=None, test_name: str = None):
         """Run a stress test for a specific endpoint"""
+        self._print_test_header(endpoint, method, concurrent_users, total_requests, test_name)
+        test_result = await self._execute_stress_test(endpoint, method, concurrent_users, total_requests,
+                                                      data_generator, test_name)
+        self.results.append(test_result)
+        self._print_test_result(test_result)
+        
+        return test_result
+    
+    def _print_test_header(self, endpoint: str, method: str, concurrent_users: int, total_requests: int,
+                           test_name: str = None):
+        """Announce a stress test before it starts"""
         print(f"\n🔥 Starting Stress Test: {test_name or endpoint}")
         print(f"   Endpoint: {method} {endpoint}")
         print(f"   Concurrent Users: {concurrent_users}")
         print(f"   Total Requests: {total_requests}")
+    
+    async def _execute_stress_test(self, endpoint: str, method: str, concurrent_users: int,
+                                   total_requests: int, data_generator=None,
+                                   test_name: str = None) -> Dict[str, Any]:
+        """Drive one stress test and return its result without printing or recording it"""
+        start_time = time.perf_counter_ns()
         
-        start_time = time.time()
-        
-        # Use connection pooling and limits for stress testing
-        connector = aiohttp.TCPConnector(limit=concurrent_users, limit_per_host=concurrent_users)
+        # Requests ride the shared session; concurrency is limited by the workers, not the pool
         timeout = aiohttp.ClientTimeout(total=30)  # 30 second timeout
         
-        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-            # Create tasks for concurrent requests
-            tasks = []
-            
-            for i in range(total_requests):
-                if data_generator:
-                    data = data_generator(f"STRESS_{i:04d}")
-                else:
-                    data = None
-                
-                task = self.make_request(session, endpoint, method, data)
-                tasks.append(task)
-            
-            # Execute all requests concurrently
-            responses = await asyncio.gather(*tasks, return_exceptions=True)
+        # Queue every request; concurrent_users workers drain it
+        items = []
+        
+        for i in range(total_requests):
+            if data_generator:
+                data = orjson.dumps(data_generator(f"STRESS_{i:04d}"))
+            else:
+                data = None
             
-            # Filter out exceptions
-            valid_responses = [r for r in responses if not isinstance(r, Exception)]
-            exceptions = [r for r in responses if isinstance(r, Exception)]
+            items.append((endpoint, method, data))
+        
+        responses_path = self._responses_path(test_name or endpoint)
+        samples, exceptions = await self._run_queue(self._session, items, concurrent_users, timeout,
+                                                    responses_path)
         
-        end_time = time.time()
-        total_time = end_time - start_time
+        total_time = (time.perf_counter_ns() - start_time) / 1e9
         
         # Analyze results
-        successful_requests = [r for r in valid_responses if r["success"]]
-        failed_requests = [r for r in valid_responses if not r["success"]]
-        
-        response_times = [r["response_time_ms"] for r in successful_requests]
-        
-        if response_times:
-            avg_response_time = statistics.mean(response_times)
-            median_response_time = statistics.median(response_times)
-            min_response_time = min(response_times)
-            max_response_time = max(response_times)
-            p95_response_time = statistics.quantiles(response_times, n=20)[18] if len(response_times) >= 20 else max(response_times)
-            p99_response_time = statistics.quantiles(response_times, n=100)[98] if len(response_times) >= 100 else max(response_times)
-        else:
-            avg_response_time = median_response_time = min_response_time = max_response_time = p95_response_time = p99_response_time = 0
+        successful_requests = samples.successful
+        failed_requests = len(samples) - successful_requests
+        
+        stats = samples.latency_stats()
+        
+        # Time spent on the work queue waiting for a free worker, reported apart from response time
+        avg_queue_time = samples.avg_queue_time_ms()
         
         # Calculate throughput
         requests_per_second = total_requests / total_time if total_time > 0 else 0
@@ -162,110 +520,98 @@ class PublishingServiceStressTester:
             "method": method,
             "concurrent_users": concurrent_users,
             "total_requests": total_requests,
-            "successful_requests": len(successful_requests),
-            "failed_requests": len(failed_requests),
+            "successful_requests": successful_requests,
+            "failed_requests": failed_requests,
             "exceptions": len(exceptions),
-            "success_rate": len(successful_requests) / total_requests * 100,
+            "success_rate": successful_requests / total_requests * 100,
             "total_time_seconds": total_time,
             "requests_per_second": requests_per_second,
-            "avg_response_time_ms": avg_response_time,
-            "median_response_time_ms": median_response_time,
-            "min_response_time_ms": min_response_time,
-            "max_response_time_ms": max_response_time,
-            "p95_response_time_ms": p95_response_time,
-            "p99_response_time_ms": p99_response_time,
-            "responses": valid_responses,
+            "avg_response_time_ms": stats["avg"],
+            "median_response_time_ms": stats["median"],
+            "min_response_time_ms": stats["min"],
+            "max_response_time_ms": stats["max"],
+            "p75_response_time_ms": stats["p75"],
+            "p90_response_time_ms": stats["p90"],
+            "p95_response_time_ms": stats["p95"],
+            "p99_response_time_ms": stats["p99"],
+            "p999_response_time_ms": stats["p999"],
+            "avg_queue_time_ms": avg_queue_time,
+            "responses_path": responses_path,
             "exception_details": [str(e) for e in exceptions]
         }
         
-        self.results.append(test_result)
-        
-        # Print results
+        return test_result
+    
+    def _print_test_result(self, test_result: Dict[str, Any]):
+        """Print the headline numbers of a finished stress test"""
+        print(f"\n📋 Results: {test_result['test_name']}")
         print(f"   ✅ Success Rate: {test_result['success_rate']:.1f}%")
-        print(f"   ❌ Failed Requests: {len(failed_requests)}")
-        print(f"   💥 Exceptions: {len(exceptions)}")
+        print(f"   ❌ Failed Requests: {test_result['failed_requests']}")
+        print(f"   💥 Exceptions: {test_result['exceptions']}")
         print(f"   📊 Throughput: {test_result['requests_per_second']:.1f} req/sec")
         print(f"   ⏱️  Avg Response Time: {test_result['avg_response_time_ms']:.1f}ms")
         print(f"   📈 P95 Response Time: {test_result['p95_response_time_ms']:.1f}ms")
         print(f"   📊 P99 Response Time: {test_result['p99_response_time_ms']:.1f}ms")
+        print(f"   📊 P99.9 Response Time: {test_result['p999_response_time_ms']:.1f}ms")
+        print(f"   ⏳ Avg Queue Time: {test_result['avg_queue_time_ms']:.1f}ms")
         print(f"   🕐 Total Time: {test_result['total_time_seconds']:.2f}s")
-        
-        return test_result
+        print(f"   💾 Raw Responses: {test_result['responses_path']}")
     
     async def run_comprehensive_stress_test(self):
         """Run comprehensive stress testing across all endpoints"""
         print("💥 Starting Comprehensive Stress Testing for Publishing Service")
         print("=" * 80)
         
-        # Test 1: Health endpoint - High load
-        await self.run_stress_test(
-            endpoint="/actuator/health",
-            method="GET",
-            concurrent_users=100,
-            total_requests=1000,
-            test_name="Health Check - High Load"
-        )
-        
-        # Test 2: Health endpoint - Extreme load
-        await self.run_stress_test(
-            endpoint="/actuator/health",
-            method="GET",
-            concurrent_users=200,
-            total_requests=2000,
-            test_name="Health Check - Extreme Load"
-        )
-        
-        # Test 3: Vendor health endpoint - High load
-        await self.run_stress_test(
-            endpoint="/api/v1/publishing/vendors/health",
-            method="GET",
-            concurrent_users=100,
-            total_requests=1000,
-            test_name="Vendor Health - High Load"
-        )
-        
-        # Test 4: Vendor health endpoint - Extreme load
-        await self.run_stress_test(
-            endpoint="/api/v1/publishing/vendors/health",
-            method="GET",
-            concurrent_users=200,
-            total_requests=2000,
-            test_name="Vendor Health - Extreme Load"
-        )
-        
-        # Test 5: Basket listing - High load
-        await self.run_stress_test(
-            endpoint="/api/v1/publishing/basket/STRESS_001/list",
-            method="POST",
-            concurrent_users=50,
-            total_requests=500,
-            data_generator=self.generate_basket_data,
-            test_name="Basket Listing - High Load"
-        )
-        
-        # Test 6: Basket listing - Extreme load
-        await self.run_stress_test(
-            endpoint="/api/v1/publishing/basket/STRESS_002/list",
-            method="POST",
-            concurrent_users=100,
-            total_requests=1000,
-            data_generator=self.generate_basket_data,
-            test_name="Basket Listing - Extreme Load"
-        )
-        
-        # Test 7: Mixed endpoints - Extreme load
-        await self.run_mixed_stress_test(
-            concurrent_users=150,
-            total_requests=1500,
-            test_name="Mixed Endpoints - Extreme Load"
-        )
+        # Tests 1-6 touch disjoint endpoints or basket ids, so they run side by side
+        concurrent_tests = [
+            # Test 1: Health endpoint - High load
+            dict(endpoint="/actuator/health", method="GET", concurrent_users=100, total_requests=1000,
+                 test_name="Health Check - High Load"),
+            # Test 2: Health endpoint - Extreme load
+            dict(endpoint="/actuator/health", method="GET", concurrent_users=200, total_requests=2000,
+                 test_name="Health Check - Extreme Load"),
+            # Test 3: Vendor health endpoint - High load
+            dict(endpoint="/api/v1/publishing/vendors/health", method="GET", concurrent_users=100,
+                 total_requests=1000, test_name="Vendor Health - High Load"),
+            # Test 4: Vendor health endpoint - Extreme load
+            dict(endpoint="/api/v1/publishing/vendors/health", method="GET", concurrent_users=200,
+                 total_requests=2000, test_name="Vendor Health - Extreme Load"),
+            # Test 5: Basket listing - High load
+            dict(endpoint="/api/v1/publishing/basket/STRESS_001/list", method="POST", concurrent_users=50,
+                 total_requests=500, data_generator=self.generate_basket_data,
+                 test_name="Basket Listing - High Load"),
+            # Test 6: Basket listing - Extreme load
+            dict(endpoint="/api/v1/publishing/basket/STRESS_002/list", method="POST", concurrent_users=100,
+                 total_requests=1000, data_generator=self.generate_basket_data,
+                 test_name="Basket Listing - Extreme Load"),
+        ]
         
-        # Test 8: Sustained load test
-        await self.run_sustained_load_test(
-            concurrent_users=75,
-            duration_seconds=60,
-            test_name="Sustained Load - 1 Minute"
-        )
+        # All tests share one session and its warm connection pool
+        async with self:
+            for test in concurrent_tests:
+                self._print_test_header(test["endpoint"], test["method"], test["concurrent_users"],
+                                        test["total_requests"], test["test_name"])
+            
+            # Stats stay per test; results are printed once every test has finished
+            results = await asyncio.gather(*(self._execute_stress_test(**test) for test in concurrent_tests))
+            for test_result in results:
+                self.results.append(test_result)
+                self._print_test_result(test_result)
+            
+            # Tests 7 and 8 stay serial since they model mixed and sustained load on their own
+            # Test 7: Mixed endpoints - Extreme load
+            await self.run_mixed_stress_test(
+                concurrent_users=150,
+                total_requests=1500,
+                test_name="Mixed Endpoints - Extreme Load"
+            )
+            
+            # Test 8: Sustained load test
+            await self.run_sustained_load_test(
+                concurrent_users=75,
+                duration_seconds=60,
+                test_name="Sustained Load - 1 Minute"
+            )
         
         print("\n" + "=" * 80)
         print("🎯 Stress Testing Complete!")
@@ -284,54 +630,46 @@ class PublishingServiceStressTester:
             ("/api/v1/publishing/basket/STRESS_MIXED_001/list", "POST", self.generate_basket_data),
         ]
         
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         
-        connector = aiohttp.TCPConnector(limit=concurrent_users, limit_per_host=concurrent_users)
         timeout = aiohttp.ClientTimeout(total=60)
         
-        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-            tasks = []
+        items = []
+        
+        # One vectorized draw picks every request's endpoint up front
+        picks = self._rng.integers(0, len(endpoints), size=total_requests, dtype=np.int8).tolist()
+        for i, pick in enumerate(picks):
+            endpoint, method, data_gen = endpoints[pick]
             
-            for i in range(total_requests):
-                endpoint, method, data_gen = random.choice(endpoints)
-                
-                if data_gen:
-                    data = data_gen(f"STRESS_MIXED_{i:04d}")
-                else:
-                    data = None
-                
-                task = self.make_request(session, endpoint, method, data)
-                tasks.append(task)
+            if data_gen:
+                data = orjson.dumps(data_gen(f"STRESS_MIXED_{i:04d}"))
+            else:
+                data = None
             
-            responses = await asyncio.gather(*tasks, return_exceptions=True)
+            items.append((endpoint, method, data))
         
-        end_time = time.time()
-        total_time = end_time - start_time
+        responses_path = self._responses_path(test_name)
+        samples, exceptions = await self._run_queue(self._session, items, concurrent_users, timeout,
+                                                    responses_path)
         
-        # Analyze mixed results
-        valid_responses = [r for r in responses if not isinstance(r, Exception)]
-        exceptions = [r for r in responses if isinstance(r, Exception)]
+        total_time = (time.perf_counter_ns() - start_time) / 1e9
         
-        successful_requests = [r for r in valid_responses if r["success"]]
-        failed_requests = [r for r in valid_responses if not r["success"]]
+        # Analyze mixed results
+        successful_requests = samples.successful
+        failed_requests = len(samples) - successful_requests
         
-        response_times = [r["response_time_ms"] for r in successful_requests]
-        
-        if response_times:
-            avg_response_time = statistics.mean(response_times)
-            p95_response_time = statistics.quantiles(response_times, n=20)[18] if len(response_times) >= 20 else max(response_times)
-        else:
-            avg_response_time = p95_response_time = 0
+        stats = samples.latency_stats()
         
         requests_per_second = total_requests / total_time if total_time > 0 else 0
         
-        print(f"   ✅ Success Rate: {len(successful_requests) / total_requests * 100:.1f}%")
-        print(f"   ❌ Failed Requests: {len(failed_requests)}")
+        print(f"   ✅ Success Rate: {successful_requests / total_requests * 100:.1f}%")
+        print(f"   ❌ Failed Requests: {failed_requests}")
         print(f"   💥 Exceptions: {len(exceptions)}")
         print(f"   📊 Throughput: {requests_per_second:.1f} req/sec")
-        print(f"   ⏱️  Avg Response Time: {avg_response_time:.1f}ms")
-        print(f"   📈 P95 Response Time: {p95_response_time:.1f}ms")
+        print(f"   ⏱️  Avg Response Time: {stats['avg']:.1f}ms")
+        print(f"   📈 P95 Response Time: {stats['p95']:.1f}ms")
         print(f"   🕐 Total Time: {total_time:.2f}s")
+        print(f"   💾 Raw Responses: {responses_path}")
     
     async def run_sustained_load_test(self, concurrent_users: int = 75, 
                                      duration_seconds: int = 60, test_name: str = "Sustained Load"):
@@ -345,57 +683,44 @@ class PublishingServiceStressTester:
             ("/api/v1/publishing/vendors/health", "GET", None),
         ]
         
-        start_time = time.time()
-        end_time = start_time + duration_seconds
+        start_time = time.perf_counter_ns()
+        end_time = start_time + duration_seconds * 1_000_000_000
         
-        connector = aiohttp.TCPConnector(limit=concurrent_users, limit_per_host=concurrent_users)
         timeout = aiohttp.ClientTimeout(total=10)
         
-        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-            all_responses = []
-            request_count = 0
-            
-            while time.time() < end_time:
-                # Create batch of concurrent requests
-                batch_tasks = []
-                batch_size = min(concurrent_users, 50)  # Limit batch size
-                
-                for _ in range(batch_size):
-                    endpoint, method, _ = random.choice(endpoints)
-                    task = self.make_request(session, endpoint, method)
-                    batch_tasks.append(task)
-                
-                # Execute batch
-                batch_responses = await asyncio.gather(*batch_tasks, return_exceptions=True)
-                all_responses.extend([r for r in batch_responses if not isinstance(r, Exception)])
-                request_count += len(batch_responses)
-                
-                # Small delay between batches
-                await asyncio.sleep(0.1)
-        
-        total_time = time.time() - start_time
+        # Each worker issues its next request as soon as the previous one returns
+        # Request count is open-ended, so stats come from the fixed-size histogram rather than raw arrays
+        samples, exceptions = RequestSamples(keep_raw=False), []
+        responses_path = self._responses_path(test_name)
+        rows = asyncio.Queue(maxsize=_ROW_QUEUE_SIZE)
+        base_wall_ns, base_mono_ns = time.time_ns(), time.perf_counter_ns()
+        writer = asyncio.create_task(self._write_rows(responses_path, rows, base_wall_ns, base_mono_ns))
+        await asyncio.gather(*(
+            self._sustained_worker(self._session, endpoints, end_time, timeout, samples, exceptions, rows)
+            for _ in range(concurrent_users)
+        ))
+        await rows.put(None)
+        await writer
+        request_count = len(samples) + len(exceptions)
+        
+        total_time = (time.perf_counter_ns() - start_time) / 1e9
         
         # Analyze sustained load results
-        successful_requests = [r for r in all_responses if r["success"]]
-        failed_requests = [r for r in all_responses if not r["success"]]
+        successful_requests = samples.successful
+        failed_requests = len(samples) - successful_requests
         
-        response_times = [r["response_time_ms"] for r in successful_requests]
-        
-        if response_times:
-            avg_response_time = statistics.mean(response_times)
-            p95_response_time = statistics.quantiles(response_times, n=20)[18] if len(response_times) >= 20 else max(response_times)
-        else:
-            avg_response_time = p95_response_time = 0
+        stats = samples.latency_stats()
         
         requests_per_second = request_count / total_time if total_time > 0 else 0
         
         print(f"   📊 Total Requests: {request_count}")
-        print(f"   ✅ Success Rate: {len(successful_requests) / len(all_responses) * 100:.1f}%")
-        print(f"   ❌ Failed Requests: {len(failed_requests)}")
+        print(f"   ✅ Success Rate: {successful_requests / len(samples) * 100:.1f}%")
+        print(f"   ❌ Failed Requests: {failed_requests}")
         print(f"   📊 Throughput: {requests_per_second:.1f} req/sec")
-        print(f"   ⏱️  Avg Response Time: {avg_response_time:.1f}ms")
-        print(f"   📈 P95 Response Time: {p95_response_time:.1f}ms")
+        print(f"   ⏱️  Avg Response Time: {stats['avg']:.1f}ms")
+        print(f"   📈 P95 Response Time: {stats['p95']:.1f}ms")
         print(f"   🕐 Total Time: {total_time:.2f}s")
+        print(f"   💾 Raw Responses: {responses_path}")
     
     def print_summary(self):
         """Print a summary of all stress test results"""
@@ -409,33 +734,54 @@ class PublishingServiceStressTester:
             print(f"   ❌ Failed: {result['failed_requests']}, 💥 Exceptions: {result['exceptions']}")
             print(f"   Throughput: {result['requests_per_second']:.1f} req/sec")
             print(f"   Avg Response Time: {result['avg_response_time_ms']:.1f}ms")
+            print(f"   P50/P75/P90: {result['median_response_time_ms']:.1f}/"
+                  f"{result['p75_response_time_ms']:.1f}/{result['p90_response_time_ms']:.1f}ms")
             print(f"   P95 Response Time: {result['p95_response_time_ms']:.1f}ms")
             print(f"   P99 Response Time: {result['p99_response_time_ms']:.1f}ms")
+            print(f"   P99.9 Response Time: {result['p999_response_time_ms']:.1f}ms")
         
-        # Save results to file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"stress_test_results_{timestamp}.json"
+        # Save the summary; per-request rows were already written to each test's responses_path
+        filename = f"stress_test_results_{self._run_id}_summary.json"
         
-        with open(filename, 'w') as f:
-            json.dump(self.results, f, indent=2, default=str)
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(self.results, option=orjson.OPT_INDENT_2))
         
         print(f"\n💾 Results saved to: {filename}")
 
 async def main():
     """Main function to run stress testing"""
-    # Check if service is running
-    import urllib.request
+    parser = argparse.ArgumentParser(description="Stress test the Publishing Service")
+    parser.add_argument("--hedge", action="store_true",
+                        help="hedge read-only GETs to measure client-observable tail latency")
+    parser.add_argument("--hedge-delay-ms", type=float, default=50.0,
+                        help="delay before firing a hedged GET (default: 50)")
+    args = parser.parse_args()
+    
+    # Check if service is running; a TCP connect is enough to know the port answers
     try:
-        urllib.request.urlopen("http://localhost:8083/actuator/health", timeout=5)
+        socket.create_connection(("127.0.0.1", 8083), timeout=1).close()
         print("✅ Publishing service is running on port 8083")
-    except:
+    except OSError:
         print("❌ Publishing service is not running on port 8083")
         print("Please start the service first: mvn spring-boot:run")
         return
     
+    # The pure-Python parser would make the client, not the service, the bottleneck
+    if not _c_parser_active():
+        print("❌ aiohttp C extensions are not active; results would measure the Python parser")
+        print("Please install aiohttp[speedups] and unset AIOHTTP_NO_EXTENSIONS")
+        return
+    
     # Initialize and run stress tests
-    tester = PublishingServiceStressTester()
+    tester = PublishingServiceStressTester(hedge_delay_ms=args.hedge_delay_ms if args.hedge else None)
     await tester.run_comprehensive_stress_test()
 
 if __name__ == "__main__":
+    # Prefer libuv's event loop for socket I/O when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     asyncio.run(main())
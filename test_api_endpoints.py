@@ -2,114 +2,186 @@
 """
 API Endpoints Testing Script for Basket Core Service
 This script tests all CRUD operations and API endpoints
+
+Requires requests and orjson.
 """
 
+import argparse
 import requests
-import json
-import time
-from typing import Dict, Any, List
-import uuid
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
+import functools
+import socket
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any
+import os
+
+# Nagle off so small JSON bodies go out immediately; keep-alive probes keep pooled sockets alive
+_SOCKET_OPTIONS = [
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+]
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections are opened with _SOCKET_OPTIONS"""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = _SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+def _safe_test(label: str, failure=False):
+    """Report any exception raised by a test method as a failed check and flush its buffered output once"""
+    def decorator(test):
+        @functools.wraps(test)
+        def wrapper(self, *args, **kwargs):
+            self._local.lines = []
+            try:
+                return test(self, *args, **kwargs)
+            except requests.exceptions.ConnectionError:
+                self._print(f"❌ {label}: Connection failed - Service not running")
+            except Exception as e:
+                self._print(f"❌ {label}: Error - {e}")
+            finally:
+                self._flush()
+            return failure
+        return wrapper
+    return decorator
 
 class BasketAPITester:
-    def __init__(self, base_url: str = "http://localhost:8081"):
+    def __init__(self, base_url: str = "http://localhost:8081", verbose: bool = False):
         self.base_url = base_url
+        # Only parse bodies whose sole use is an informational message when asked to
+        self.verbose = verbose
+        self._baskets_url = f"{base_url}/api/v1/baskets"
+        self._health_url = f"{self._baskets_url}/health"
+        self._actuator_health_url = f"{base_url}/actuator/health"
+        self._metrics_url = f"{base_url}/actuator/metrics"
         self.session = requests.Session()
+        # Keep enough pooled keep-alive connections for the concurrent tests; retry transient
+        # gateway errors on reads only, so writes such as status transitions are never resent,
+        # and hand back the last response rather than raising so tests can report it
+        adapter = _KeepAliveAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            pool_block=False,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.1,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=frozenset({"GET", "HEAD"}),
+                raise_on_status=False
+            )
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         self.session.headers.update({
             'Content-Type': 'application/json',
             'Accept': 'application/json'
         })
+        self._print_lock = threading.Lock()
+        # Per-thread line buffer of the test currently running on that thread
+        self._local = threading.local()
+        # Create body serialized once; each call only splices in a fresh basket code
+        self._create_tpl_bytes = orjson.dumps({
+            "basketCode": "__CODE__",
+            "basketName": "API Test Basket",
+            "description": "Basket created via API testing",
+            "basketType": "EQUITY",
+            "baseCurrency": "USD",
+            "totalWeight": 100.0,
+            "version": "v1.0",
+            "previousVersion": None,
+            "createdBy": "apitest",
+            "constituents": []
+        })
+    
+    def _print(self, *args):
+        """Buffer one line for the running test, or print it straight away outside a test"""
+        line = " ".join(str(arg) for arg in args)
+        lines = getattr(self._local, 'lines', None)
+        if lines is None:
+            with self._print_lock:
+                sys.stdout.write(line + "\n")
+        else:
+            lines.append(line)
+    
+    def _flush(self):
+        """Write the running test's buffered lines in one call so concurrent tests never interleave"""
+        lines, self._local.lines = self._local.lines, None
+        if lines:
+            with self._print_lock:
+                sys.stdout.write("\n".join(lines) + "\n")
         
+    @_safe_test("Health Check")
     def test_health_endpoint(self) -> bool:
         """Test the health endpoint"""
-        try:
-            # Test both the custom health endpoint and the Actuator health endpoint
-            response = self.session.get(f"{self.base_url}/api/v1/baskets/health")
-            print(f"✅ Custom Health Check: {response.status_code}")
-            if response.status_code == 200:
-                data = response.json()
-                if isinstance(data, dict):
-                    print(f"   Health Status: {data.get('data', 'Unknown')}")
-                else:
-                    print(f"   Health Response: {data}")
-                return True
-            
-            # Also test the Actuator health endpoint
-            actuator_response = self.session.get(f"{self.base_url}/actuator/health")
-            print(f"✅ Actuator Health Check: {actuator_response.status_code}")
-            if actuator_response.status_code == 200:
-                actuator_data = actuator_response.json()
-                print(f"   Actuator Status: {actuator_data.get('status', 'Unknown')}")
-                return True
-            return False
-        except requests.exceptions.ConnectionError:
-            print("❌ Health Check: Connection failed - Service not running")
-            return False
-        except Exception as e:
-            print(f"❌ Health Check: Error - {e}")
-            return False
+        # Test both the custom health endpoint and the Actuator health endpoint
+        response = self.session.get(self._health_url)
+        self._print(f"✅ Custom Health Check: {response.status_code}")
+        if response.status_code == 200:
+            data = orjson.loads(response.content)
+            if isinstance(data, dict):
+                self._print(f"   Health Status: {data.get('data', 'Unknown')}")
+            else:
+                self._print(f"   Health Response: {data}")
+            return True
+        
+        # Also test the Actuator health endpoint
+        actuator_response = self.session.get(self._actuator_health_url)
+        self._print(f"✅ Actuator Health Check: {actuator_response.status_code}")
+        if actuator_response.status_code == 200:
+            actuator_data = orjson.loads(actuator_response.content)
+            self._print(f"   Actuator Status: {actuator_data.get('status', 'Unknown')}")
+            return True
+        return False
     
+    @_safe_test("Get All Baskets")
     def test_get_all_baskets(self) -> bool:
         """Test getting all baskets"""
-        try:
-            response = self.session.get(f"{self.base_url}/api/v1/baskets")
-            print(f"✅ Get All Baskets: {response.status_code}")
-            if response.status_code == 200:
-                data = response.json()
-                baskets = data.get('data', {}).get('baskets', [])
-                print(f"   Found {len(baskets)} baskets")
-                for basket in baskets[:3]:  # Show first 3
-                    print(f"     - {basket.get('basketCode')}: {basket.get('basketName')}")
-                return True
-            return False
-        except Exception as e:
-            print(f"❌ Get All Baskets: Error - {e}")
-            return False
+        response = self.session.get(self._baskets_url)
+        self._print(f"✅ Get All Baskets: {response.status_code}")
+        if response.status_code == 200:
+            data = orjson.loads(response.content)
+            baskets = data.get('data', {}).get('baskets', [])
+            self._print(f"   Found {len(baskets)} baskets")
+            for basket in baskets[:3]:  # Show first 3
+                self._print(f"     - {basket.get('basketCode')}: {basket.get('basketName')}")
+            return True
+        return False
     
+    @_safe_test("Get Basket by ID")
     def test_get_basket_by_id(self, basket_id: str) -> bool:
         """Test getting a specific basket by ID"""
-        try:
-            response = self.session.get(f"{self.base_url}/api/v1/baskets/{basket_id}")
-            print(f"✅ Get Basket by ID: {response.status_code}")
-            if response.status_code == 200:
-                data = response.json()
-                basket = data.get('data', {})
-                print(f"   Basket: {basket.get('basketCode')} - {basket.get('basketName')}")
-                return True
-            return False
-        except Exception as e:
-            print(f"❌ Get Basket by ID: Error - {e}")
-            return False
+        response = self.session.get(f"{self._baskets_url}/{basket_id}")
+        self._print(f"✅ Get Basket by ID: {response.status_code}")
+        if response.status_code == 200:
+            data = orjson.loads(response.content)
+            basket = data.get('data', {})
+            self._print(f"   Basket: {basket.get('basketCode')} - {basket.get('basketName')}")
+            return True
+        return False
     
+    @_safe_test("Create Basket", failure=None)
     def test_create_basket(self) -> str:
         """Test creating a new basket"""
-        basket_data = {
-            "basketCode": f"TEST_API_{uuid.uuid4().hex[:8].upper()}",
-            "basketName": "API Test Basket",
-            "description": "Basket created via API testing",
-            "basketType": "EQUITY",
-            "baseCurrency": "USD",
-            "totalWeight": 100.0,
-            "version": "v1.0",
-            "previousVersion": None,
-            "createdBy": "apitest",
-            "constituents": []
-        }
+        code = f"TEST_API_{os.urandom(4).hex().upper()}".encode()
+        body = self._create_tpl_bytes.replace(b"__CODE__", code)
         
-        try:
-            response = self.session.post(f"{self.base_url}/api/v1/baskets", json=basket_data)
-            print(f"✅ Create Basket: {response.status_code}")
-            if response.status_code == 200:
-                data = response.json()
-                basket_id = data.get('data')
-                print(f"   Created basket with ID: {basket_id}")
-                return basket_id
-            else:
-                print(f"   Error: {response.text}")
-                return None
-        except Exception as e:
-            print(f"❌ Create Basket: Error - {e}")
+        response = self.session.post(self._baskets_url, data=body)
+        self._print(f"✅ Create Basket: {response.status_code}")
+        if response.status_code == 200:
+            data = orjson.loads(response.content)
+            basket_id = data.get('data')
+            self._print(f"   Created basket with ID: {basket_id}")
+            return basket_id
+        else:
+            self._print(f"   Error: {response.text}")
             return None
     
+    @_safe_test("Update Basket")
     def test_update_basket(self, basket_id: str) -> bool:
         """Test updating a basket"""
         update_data = {
@@ -118,20 +190,17 @@ class BasketAPITester:
             "updatedBy": "apitest"
         }
         
-        try:
-            response = self.session.put(f"{self.base_url}/api/v1/baskets/{basket_id}", json=update_data)
-            print(f"✅ Update Basket: {response.status_code}")
-            if response.status_code == 200:
-                data = response.json()
-                print(f"   Updated basket: {data.get('data', {}).get('basketName', 'Unknown')}")
-                return True
-            else:
-                print(f"   Error: {response.text}")
-                return False
-        except Exception as e:
-            print(f"❌ Update Basket: Error - {e}")
+        response = self.session.put(f"{self._baskets_url}/{basket_id}", data=orjson.dumps(update_data))
+        self._print(f"✅ Update Basket: {response.status_code}")
+        if response.status_code == 200:
+            data = orjson.loads(response.content)
+            self._print(f"   Updated basket: {data.get('data', {}).get('basketName', 'Unknown')}")
+            return True
+        else:
+            self._print(f"   Error: {response.text}")
             return False
     
+    @_safe_test("Update Basket Status")
     def test_update_basket_status(self, basket_id: str) -> bool:
         """Test updating basket status using state machine workflow"""
         status_data = {
@@ -139,53 +208,45 @@ class BasketAPITester:
             "updatedBy": "apitest"
         }
         
-        try:
-            response = self.session.put(f"{self.base_url}/api/v1/baskets/{basket_id}/status", json=status_data)
-            print(f"✅ Update Basket Status: {response.status_code}")
-            if response.status_code == 200:
-                data = response.json()
-                print(f"   Status updated successfully: {data.get('message', 'Unknown')}")
-                return True
-            else:
-                print(f"   Error: {response.text}")
-                return False
-        except Exception as e:
-            print(f"❌ Update Basket Status: Error - {e}")
+        response = self.session.put(f"{self._baskets_url}/{basket_id}/status", data=orjson.dumps(status_data))
+        self._print(f"✅ Update Basket Status: {response.status_code}")
+        if response.status_code == 200:
+            if self.verbose:
+                data = orjson.loads(response.content)
+                self._print(f"   Status updated successfully: {data.get('message', 'Unknown')}")
+            return True
+        else:
+            self._print(f"   Error: {response.text}")
             return False
     
+    @_safe_test("Delete Basket")
     def test_delete_basket(self, basket_id: str) -> bool:
         """Test deleting a basket (soft delete)"""
-        try:
-            response = self.session.delete(f"{self.base_url}/api/v1/baskets/{basket_id}?deletedBy=apitest")
-            print(f"✅ Delete Basket: {response.status_code}")
-            if response.status_code == 200:
-                data = response.json()
-                print(f"   Deleted basket successfully: {data.get('message', 'Unknown')}")
-                return True
-            else:
-                print(f"   Error: {response.text}")
-                return False
-        except Exception as e:
-            print(f"❌ Delete Basket: Error - {e}")
+        response = self.session.delete(f"{self._baskets_url}/{basket_id}?deletedBy=apitest")
+        self._print(f"✅ Delete Basket: {response.status_code}")
+        if response.status_code == 200:
+            if self.verbose:
+                data = orjson.loads(response.content)
+                self._print(f"   Deleted basket successfully: {data.get('message', 'Unknown')}")
+            return True
+        else:
+            self._print(f"   Error: {response.text}")
             return False
     
+    @_safe_test("Metrics Endpoint")
     def test_metrics_endpoint(self) -> bool:
         """Test the metrics endpoint"""
-        try:
-            response = self.session.get(f"{self.base_url}/actuator/metrics")
-            print(f"✅ Metrics Endpoint: {response.status_code}")
-            if response.status_code == 200:
-                data = response.json()
-                metric_names = data.get('names', [])
-                basket_metrics = [m for m in metric_names if 'basket.operations' in m]
-                print(f"   Found {len(basket_metrics)} basket operation metrics")
-                for metric in basket_metrics[:5]:  # Show first 5
-                    print(f"     - {metric}")
-                return True
-            return False
-        except Exception as e:
-            print(f"❌ Metrics Endpoint: Error - {e}")
-            return False
+        response = self.session.get(self._metrics_url)
+        self._print(f"✅ Metrics Endpoint: {response.status_code}")
+        if response.status_code == 200:
+            data = orjson.loads(response.content)
+            metric_names = data.get('names', [])
+            basket_metrics = [m for m in metric_names if 'basket.operations' in m]
+            self._print(f"   Found {len(basket_metrics)} basket operation metrics")
+            for metric in basket_metrics[:5]:  # Show first 5
+                self._print(f"     - {metric}")
+            return True
+        return False
     
     def run_full_test_suite(self) -> Dict[str, Any]:
         """Run the complete test suite"""
@@ -203,18 +264,23 @@ class BasketAPITester:
             'metrics': False
         }
         
-        # Test 1: Health Check
-        print("\n1️⃣ Testing Health Endpoint")
-        results['health_check'] = self.test_health_endpoint()
+        # Tests 1, 2 and 8 (Health, Get All Baskets, Metrics) are independent reads, so run them together
+        print("\n1️⃣ 2️⃣ 8️⃣ Testing Health, Get All Baskets and Metrics Endpoints concurrently")
+        independent_tests = {
+            'health_check': self.test_health_endpoint,
+            'get_all_baskets': self.test_get_all_baskets,
+            'metrics': self.test_metrics_endpoint
+        }
+        with ThreadPoolExecutor(max_workers=len(independent_tests)) as executor:
+            futures = {name: executor.submit(test) for name, test in independent_tests.items()}
+            for name, future in futures.items():
+                results[name] = future.result()
         
         if not results['health_check']:
             print("❌ Service is not running. Cannot continue with API tests.")
             return results
         
-        # Test 2: Get All Baskets
-        print("\n2️⃣ Testing Get All Baskets")
-        results['get_all_baskets'] = self.test_get_all_baskets()
-        
+        # The CRUD chain stays sequential since every step depends on the created basket_id
         # Test 3: Create Basket
         print("\n3️⃣ Testing Create Basket")
         basket_id = self.test_create_basket()
@@ -237,10 +303,6 @@ class BasketAPITester:
             print("\n7️⃣ Testing Delete Basket")
             results['delete_basket'] = self.test_delete_basket(basket_id)
         
-        # Test 8: Metrics
-        print("\n8️⃣ Testing Metrics Endpoint")
-        results['metrics'] = self.test_metrics_endpoint()
-        
         # Summary
         print("\n" + "=" * 60)
         print("📊 TEST RESULTS SUMMARY")
@@ -259,7 +321,12 @@ class BasketAPITester:
 
 def main():
     """Main function to run the API tests"""
-    tester = BasketAPITester()
+    parser = argparse.ArgumentParser(description="Test the Basket Core Service API endpoints")
+    parser.add_argument("--verbose", action="store_true",
+                        help="parse and print the response messages of the status and delete tests")
+    args = parser.parse_args()
+    
+    tester = BasketAPITester(verbose=args.verbose)
     
     # Check if service is running
     if not tester.test_health_endpoint():
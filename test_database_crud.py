@@ -2,13 +2,59 @@
 """
 Database CRUD Operations Testing Script
 This script tests CRUD operations directly against the PostgreSQL database
+
+Set BULK_SEED_N to also COPY that many extra constituents into the test basket.
 """
 
 import psycopg2
-import uuid
-from datetime import datetime
+from psycopg2.extras import execute_values
+import csv
+import functools
+import io
+import os
 from typing import Dict, Any, List
 
+# Extra constituents streamed in with COPY by the CREATE test (0 disables the bulk seed)
+_BULK_SEED_N = int(os.environ.get("BULK_SEED_N", "0"))
+
+# Rows pulled per network round trip when streaming advanced-query results from a server-side cursor
+_STREAM_ITERSIZE = 1000
+
+# Statements issued repeatedly per session, parsed and planned once by the server at connect time
+_PREPARED_STATEMENTS = {
+    # Basket rename plus both constituent weight changes in one round trip; returns the
+    # rows touched by each part so every step can still be checked on its own
+    "update_basket_and_weights": """
+        WITH basket AS (
+            UPDATE baskets
+            SET basket_name = $1, description = $2, updated_at = now()
+            WHERE id = $3
+            RETURNING 1
+        ), weights AS (
+            UPDATE basket_constituents AS bc
+            SET weight = v.w, updated_at = now()
+            FROM (VALUES ($4, $5::numeric), ($6, $7::numeric)) AS v(sym, w)
+            WHERE bc.basket_id = $3 AND bc.symbol = v.sym
+            RETURNING 1
+        )
+        SELECT (SELECT COUNT(*) FROM basket),
+               (SELECT COUNT(*) FROM weights)
+    """
+}
+
+def _safe_test(label: str, failure=False):
+    """Report any exception raised by a test method as a failed check instead of propagating it"""
+    def decorator(test):
+        @functools.wraps(test)
+        def wrapper(*args, **kwargs):
+            try:
+                return test(*args, **kwargs)
+            except Exception as e:
+                print(f"❌ {label} failed: {e}")
+                return failure
+        return wrapper
+    return decorator
+
 class DatabaseCRUDTester:
     def __init__(self, host="localhost", database="basket_platform", user="basket_app_user", password="basket_app_password"):
         self.connection_params = {
@@ -21,14 +67,26 @@ class DatabaseCRUDTester:
     def connect(self):
         """Establish database connection"""
         try:
+            # Autocommit stays off: each test runs in one transaction and commits once
             self.conn = psycopg2.connect(**self.connection_params)
-            self.conn.autocommit = True
             self.cursor = self.conn.cursor()
             print("✅ Database connection established")
-            return True
         except Exception as e:
             print(f"❌ Database connection failed: {e}")
             return False
+        return self._prepare_statements()
+    
+    def _prepare_statements(self) -> bool:
+        """Prepare _PREPARED_STATEMENTS on the open connection"""
+        for name, sql in _PREPARED_STATEMENTS.items():
+            try:
+                with self.conn:
+                    self.cursor.execute(f"PREPARE {name} AS {sql}")
+            except Exception as e:
+                print(f"❌ Prepare statement {name} failed: {e}")
+                self.disconnect()
+                return False
+        return True
     
     def disconnect(self):
         """Close database connection"""
@@ -36,261 +94,266 @@ class DatabaseCRUDTester:
             self.conn.close()
             print("✅ Database connection closed")
     
+    @_safe_test("Read operations")
     def test_read_operations(self) -> bool:
         """Test READ operations"""
         print("\n📖 Testing READ Operations")
         print("-" * 40)
         
-        try:
-            # Test 1: Read all baskets
-            self.cursor.execute("SELECT id, basket_code, basket_name, status, constituent_count FROM baskets WHERE is_active = true")
-            baskets = self.cursor.fetchall()
-            print(f"✅ Read All Baskets: Found {len(baskets)} baskets")
-            for basket in baskets:
-                print(f"   - {basket[1]} ({basket[2]}) - Status: {basket[3]}, Constituents: {basket[4]}")
-            
-            # Test 2: Read specific basket
-            if baskets:
-                basket_id = baskets[0][0]
-                self.cursor.execute("SELECT * FROM baskets WHERE id = %s", (basket_id,))
-                basket = self.cursor.fetchone()
-                print(f"✅ Read Specific Basket: {basket[2]} ({basket[1]})")
-            
-            # Test 3: Read basket constituents
-            if baskets:
-                self.cursor.execute("""
-                    SELECT bc.symbol, bc.symbol_name, bc.weight, bc.sector, bc.country 
-                    FROM basket_constituents bc 
-                    JOIN baskets b ON bc.basket_id = b.id 
-                    WHERE b.id = %s AND bc.is_active = true
-                """, (basket_id,))
-                constituents = self.cursor.fetchall()
-                print(f"✅ Read Basket Constituents: Found {len(constituents)} constituents")
-                for const in constituents[:3]:  # Show first 3
-                    print(f"   - {const[0]} ({const[1]}) - Weight: {const[2]}%, Sector: {const[3]}")
-            
-            # Test 4: Read with filtering
-            self.cursor.execute("SELECT COUNT(*) FROM baskets WHERE status = 'DRAFT' AND is_active = true")
-            draft_count = self.cursor.fetchone()[0]
-            print(f"✅ Read with Filtering: Found {draft_count} draft baskets")
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ Read operations failed: {e}")
-            return False
+        # Test 1: Read all baskets, with the DRAFT count for Test 4 computed in the same scan
+        self.cursor.execute("""
+            SELECT id, basket_code, basket_name, status, constituent_count,
+                   COUNT(*) FILTER (WHERE status = 'DRAFT') OVER () AS draft_count
+            FROM baskets
+            WHERE is_active = true
+        """)
+        baskets = self.cursor.fetchall()
+        print(f"✅ Read All Baskets: Found {len(baskets)} baskets")
+        for basket in baskets:
+            print(f"   - {basket[1]} ({basket[2]}) - Status: {basket[3]}, Constituents: {basket[4]}")
+        
+        # Test 2: Read specific basket
+        if baskets:
+            basket_id = baskets[0][0]
+            self.cursor.execute("SELECT basket_code, basket_name FROM baskets WHERE id = %s", (basket_id,))
+            basket = self.cursor.fetchone()
+            print(f"✅ Read Specific Basket: {basket[1]} ({basket[0]})")
+        
+        # Test 3: Read basket constituents
+        if baskets:
+            self.cursor.execute("""
+                SELECT bc.symbol, bc.symbol_name, bc.weight, bc.sector, bc.country 
+                FROM basket_constituents bc 
+                JOIN baskets b ON bc.basket_id = b.id 
+                WHERE b.id = %s AND bc.is_active = true
+            """, (basket_id,))
+            constituents = self.cursor.fetchall()
+            print(f"✅ Read Basket Constituents: Found {len(constituents)} constituents")
+            for const in constituents[:3]:  # Show first 3
+                print(f"   - {const[0]} ({const[1]}) - Weight: {const[2]}%, Sector: {const[3]}")
+        
+        # Test 4: Read with filtering
+        draft_count = baskets[0][5] if baskets else 0
+        print(f"✅ Read with Filtering: Found {draft_count} draft baskets")
+        
+        return True
     
+    @_safe_test("Create operations", failure=None)
     def test_create_operations(self) -> str:
         """Test CREATE operations"""
         print("\n📝 Testing CREATE Operations")
         print("-" * 40)
         
-        try:
-            # Generate unique basket code
-            basket_code = f"TEST_CRUD_{uuid.uuid4().hex[:8].upper()}"
-            
-            # Test 1: Create new basket
-            self.cursor.execute("""
-                INSERT INTO baskets (
-                    basket_code, basket_name, description, basket_type, base_currency,
-                    total_weight, status, version, created_by, is_active, constituent_count
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id
-            """, (
-                basket_code, "CRUD Test Basket", "Basket created via CRUD testing",
-                "EQUITY", "USD", 100.00, "DRAFT", "v1.0", "crudtest", True, 0
-            ))
-            
-            basket_id = self.cursor.fetchone()[0]
-            print(f"✅ Create Basket: Created basket with ID {basket_id} and code {basket_code}")
-            
-            # Test 2: Create basket constituent
-            self.cursor.execute("""
-                INSERT INTO basket_constituents (
-                    basket_id, symbol, symbol_name, weight, shares, sector, country, currency, is_active
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING entity_id
-            """, (
-                basket_id, "NVDA", "NVIDIA Corp.", 50.00, 100, "Technology", "US", "USD", True
-            ))
-            
-            constituent_id = self.cursor.fetchone()[0]
+        # Generate unique basket code
+        basket_code = f"TEST_CRUD_{os.urandom(4).hex().upper()}"
+        
+        # Test 1: Create new basket
+        self.cursor.execute("""
+            INSERT INTO baskets (
+                basket_code, basket_name, description, basket_type, base_currency,
+                total_weight, status, version, created_by, is_active, constituent_count
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING id
+        """, (
+            basket_code, "CRUD Test Basket", "Basket created via CRUD testing",
+            "EQUITY", "USD", 100.00, "DRAFT", "v1.0", "crudtest", True, 0
+        ))
+        
+        basket_id = self.cursor.fetchone()[0]
+        print(f"✅ Create Basket: Created basket with ID {basket_id} and code {basket_code}")
+        
+        # Test 2: Create basket constituents in one multi-row INSERT
+        rows = [
+            (basket_id, "NVDA", "NVIDIA Corp.", 50.00, 100, "Technology", "US", "USD", True),
+            (basket_id, "AMD", "Advanced Micro Devices", 50.00, 200, "Technology", "US", "USD", True)
+        ]
+        constituent_ids = execute_values(self.cursor, """
+            INSERT INTO basket_constituents (
+                basket_id, symbol, symbol_name, weight, shares, sector, country, currency, is_active
+            ) VALUES %s
+            RETURNING entity_id
+        """, rows, page_size=500, fetch=True)
+        
+        for (constituent_id,) in constituent_ids:
             print(f"✅ Create Constituent: Created constituent with ID {constituent_id}")
-            
-            # Test 3: Create another constituent
-            self.cursor.execute("""
-                INSERT INTO basket_constituents (
-                    basket_id, symbol, symbol_name, weight, shares, sector, country, currency, is_active
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING entity_id
-            """, (
-                basket_id, "AMD", "Advanced Micro Devices", 50.00, 200, "Technology", "US", "USD", True
-            ))
-            
-            print(f"✅ Create Constituent: Created second constituent")
-            
-            # Update constituent count
-            self.cursor.execute("UPDATE baskets SET constituent_count = 2 WHERE id = %s", (basket_id,))
-            print(f"✅ Update: Updated basket constituent count")
-            
-            return basket_id
-            
-        except Exception as e:
-            print(f"❌ Create operations failed: {e}")
-            return None
+        
+        if _BULK_SEED_N > 0:
+            self._bulk_seed_constituents(basket_id, _BULK_SEED_N)
+        
+        # Update constituent count from the rows actually stored
+        self.cursor.execute("""
+            UPDATE baskets
+            SET constituent_count = (
+                SELECT COUNT(*) FROM basket_constituents WHERE basket_id = %s AND is_active = true
+            )
+            WHERE id = %s
+        """, (basket_id, basket_id))
+        print(f"✅ Update: Updated basket constituent count")
+        
+        return basket_id
+    
+    def _bulk_seed_constituents(self, basket_id: str, count: int):
+        """Stream placeholder constituents into the basket with COPY FROM STDIN"""
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerows(
+            (basket_id, f"SEED{i:06d}", f"Seed Constituent {i}", 0.01, 1, "Technology", "US", "USD", True)
+            for i in range(count)
+        )
+        buf.seek(0)
+        self.cursor.copy_expert("""
+            COPY basket_constituents (
+                basket_id, symbol, symbol_name, weight, shares, sector, country, currency, is_active
+            ) FROM STDIN WITH CSV
+        """, buf)
+        print(f"✅ Bulk Seed: Copied {count} constituents")
     
+    @_safe_test("Update operations")
     def test_update_operations(self, basket_id: str) -> bool:
         """Test UPDATE operations"""
         print("\n✏️ Testing UPDATE Operations")
         print("-" * 40)
         
-        try:
-            # Test 1: Update basket
-            self.cursor.execute("""
-                UPDATE baskets 
-                SET basket_name = %s, description = %s, updated_at = %s
-                WHERE id = %s
-            """, ("Updated CRUD Test Basket", "Basket updated via CRUD testing", datetime.now(), basket_id))
-            
-            if self.cursor.rowcount > 0:
-                print(f"✅ Update Basket: Updated basket {basket_id}")
-            else:
-                print(f"❌ Update Basket: No rows affected")
-                return False
-            
-            # Test 2: Update constituent weight
-            self.cursor.execute("""
-                UPDATE basket_constituents 
-                SET weight = %s, updated_at = %s
-                WHERE basket_id = %s AND symbol = %s
-            """, (60.00, datetime.now(), basket_id, "NVDA"))
-            
-            if self.cursor.rowcount > 0:
-                print(f"✅ Update Constituent: Updated NVDA weight to 60%")
-            else:
-                print(f"❌ Update Constituent: No rows affected")
-                return False
-            
-            # Test 3: Update constituent weight for AMD (should become 40%)
-            self.cursor.execute("""
-                UPDATE basket_constituents 
-                SET weight = %s, updated_at = %s
-                WHERE basket_id = %s AND symbol = %s
-            """, (40.00, datetime.now(), basket_id, "AMD"))
-            
-            if self.cursor.rowcount > 0:
-                print(f"✅ Update Constituent: Updated AMD weight to 40%")
-            else:
-                print(f"❌ Update Constituent: No rows affected")
-                return False
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ Update operations failed: {e}")
+        # Tests 1-3 travel together instead of waiting on three separate round trips
+        self.cursor.execute(
+            "EXECUTE update_basket_and_weights (%s, %s, %s, %s, %s, %s, %s)",
+            ("Updated CRUD Test Basket", "Basket updated via CRUD testing", basket_id,
+             "NVDA", 60.00, "AMD", 40.00)
+        )
+        basket_rows, weight_rows = self.cursor.fetchone()
+        
+        # Test 1: Update basket
+        if basket_rows > 0:
+            print(f"✅ Update Basket: Updated basket {basket_id}")
+        else:
+            print(f"❌ Update Basket: No rows affected")
+            return False
+        
+        # Tests 2-3: Update NVDA and AMD weights (should become 60% / 40%) in one statement
+        if weight_rows == 2:
+            print(f"✅ Update Constituent: Updated NVDA weight to 60%")
+            print(f"✅ Update Constituent: Updated AMD weight to 40%")
+        else:
+            print(f"❌ Update Constituent: Expected 2 rows affected, got {weight_rows}")
             return False
+        
+        return True
     
+    @_safe_test("Delete operations")
     def test_delete_operations(self, basket_id: str) -> bool:
         """Test DELETE operations"""
         print("\n🗑️ Testing DELETE Operations")
         print("-" * 40)
         
-        try:
-            # Test 1: Soft delete basket (set is_active = false)
-            self.cursor.execute("""
-                UPDATE baskets 
-                SET is_active = false, updated_at = %s
-                WHERE id = %s
-            """, (datetime.now(), basket_id))
-            
-            if self.cursor.rowcount > 0:
-                print(f"✅ Soft Delete Basket: Deactivated basket {basket_id}")
-            else:
-                print(f"❌ Soft Delete Basket: No rows affected")
-                return False
-            
-            # Test 2: Soft delete constituents
-            self.cursor.execute("""
-                UPDATE basket_constituents 
-                SET is_active = false, updated_at = %s
-                WHERE basket_id = %s
-            """, (datetime.now(), basket_id))
-            
-            if self.cursor.rowcount > 0:
-                print(f"✅ Soft Delete Constituents: Deactivated {self.cursor.rowcount} constituents")
-            else:
-                print(f"❌ Soft Delete Constituents: No rows affected")
-                return False
-            
-            # Test 3: Verify soft delete
-            self.cursor.execute("SELECT COUNT(*) FROM baskets WHERE id = %s AND is_active = false", (basket_id,))
-            inactive_count = self.cursor.fetchone()[0]
-            print(f"✅ Verify Soft Delete: Found {inactive_count} inactive basket")
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ Delete operations failed: {e}")
+        # Test 1: Soft delete basket (set is_active = false)
+        self.cursor.execute("""
+            UPDATE baskets 
+            SET is_active = false, updated_at = now()
+            WHERE id = %s
+        """, (basket_id,))
+        
+        if self.cursor.rowcount > 0:
+            print(f"✅ Soft Delete Basket: Deactivated basket {basket_id}")
+        else:
+            print(f"❌ Soft Delete Basket: No rows affected")
+            return False
+        
+        # Test 2: Soft delete constituents
+        self.cursor.execute("""
+            UPDATE basket_constituents 
+            SET is_active = false, updated_at = now()
+            WHERE basket_id = %s
+        """, (basket_id,))
+        
+        if self.cursor.rowcount > 0:
+            print(f"✅ Soft Delete Constituents: Deactivated {self.cursor.rowcount} constituents")
+        else:
+            print(f"❌ Soft Delete Constituents: No rows affected")
             return False
+        
+        # Test 3: Verify soft delete
+        self.cursor.execute("SELECT COUNT(*) FROM baskets WHERE id = %s AND is_active = false", (basket_id,))
+        inactive_count = self.cursor.fetchone()[0]
+        print(f"✅ Verify Soft Delete: Found {inactive_count} inactive basket")
+        
+        return True
+    
+    def _stream_rows(self, name: str, sql: str):
+        """Yield a query's rows from a named server-side cursor, _STREAM_ITERSIZE rows per fetch"""
+        with self.conn.cursor(name=name) as cursor:
+            cursor.itersize = _STREAM_ITERSIZE
+            cursor.execute(sql)
+            yield from cursor
     
+    @_safe_test("Advanced queries")
     def test_advanced_queries(self) -> bool:
         """Test advanced query operations"""
         print("\n🔍 Testing Advanced Queries")
         print("-" * 40)
         
-        try:
-            # Test 1: Count baskets by status
-            self.cursor.execute("""
-                SELECT status, COUNT(*) as count 
-                FROM baskets 
-                WHERE is_active = true 
-                GROUP BY status 
-                ORDER BY count DESC
-            """)
-            status_counts = self.cursor.fetchall()
-            print(f"✅ Status Count Query: Found {len(status_counts)} status types")
-            for status, count in status_counts:
-                print(f"   - {status}: {count} baskets")
-            
-            # Test 2: Sector analysis
-            self.cursor.execute("""
-                SELECT bc.sector, COUNT(*) as constituent_count, AVG(bc.weight) as avg_weight
-                FROM basket_constituents bc
-                JOIN baskets b ON bc.basket_id = b.id
-                WHERE bc.is_active = true AND b.is_active = true
-                GROUP BY bc.sector
-                ORDER BY constituent_count DESC
-            """)
-            sector_analysis = self.cursor.fetchall()
-            print(f"✅ Sector Analysis Query: Found {len(sector_analysis)} sectors")
-            for sector, count, avg_weight in sector_analysis:
-                print(f"   - {sector}: {count} constituents, avg weight: {avg_weight:.2f}%")
-            
-            # Test 3: Basket performance summary
-            self.cursor.execute("""
-                SELECT 
-                    b.basket_code,
-                    b.basket_name,
-                    b.status,
-                    b.constituent_count,
-                    COALESCE(SUM(bc.weight), 0) as total_weight
-                FROM baskets b
-                LEFT JOIN basket_constituents bc ON b.id = bc.basket_id AND bc.is_active = true
-                WHERE b.is_active = true
-                GROUP BY b.id, b.basket_code, b.basket_name, b.status, b.constituent_count
-                ORDER BY b.created_at DESC
+        # Test 1: Count baskets by status
+        self.cursor.execute("""
+            SELECT status, COUNT(*) as count 
+            FROM baskets 
+            WHERE is_active = true 
+            GROUP BY status 
+            ORDER BY count DESC
+        """)
+        status_counts = self.cursor.fetchall()
+        print(f"✅ Status Count Query: Found {len(status_counts)} status types")
+        for status, count in status_counts:
+            print(f"   - {status}: {count} baskets")
+        
+        # Test 2: Sector analysis (rows are streamed from a server-side cursor, so the count comes last)
+        sector_count = 0
+        for sector, count, avg_weight in self._stream_rows("sector_analysis", """
+            SELECT bc.sector, COUNT(*) as constituent_count, AVG(bc.weight) as avg_weight
+            FROM basket_constituents bc
+            JOIN baskets b ON bc.basket_id = b.id
+            WHERE bc.is_active = true AND b.is_active = true
+            GROUP BY bc.sector
+            ORDER BY constituent_count DESC
+        """):
+            print(f"   - {sector}: {count} constituents, avg weight: {avg_weight:.2f}%")
+            sector_count += 1
+        print(f"✅ Sector Analysis Query: Found {sector_count} sectors")
+        
+        # Test 3: Basket performance summary (pick the 5 newest baskets first, then aggregate only theirs)
+        summary_count = 0
+        for basket in self._stream_rows("basket_summary", """
+            WITH top AS (
+                SELECT id, basket_code, basket_name, status, constituent_count, created_at
+                FROM baskets
+                WHERE is_active = true
+                ORDER BY created_at DESC
                 LIMIT 5
-            """)
-            basket_summary = self.cursor.fetchall()
-            print(f"✅ Basket Summary Query: Found {len(basket_summary)} baskets")
-            for basket in basket_summary:
-                print(f"   - {basket[0]} ({basket[1]}): {basket[2]}, {basket[3]} constituents, {basket[4]}% weight")
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ Advanced queries failed: {e}")
-            return False
+            )
+            SELECT 
+                t.basket_code,
+                t.basket_name,
+                t.status,
+                t.constituent_count,
+                COALESCE(SUM(bc.weight), 0) as total_weight
+            FROM top t
+            LEFT JOIN basket_constituents bc ON t.id = bc.basket_id AND bc.is_active = true
+            GROUP BY t.id, t.basket_code, t.basket_name, t.status, t.constituent_count, t.created_at
+            ORDER BY t.created_at DESC
+        """):
+            print(f"   - {basket[0]} ({basket[1]}): {basket[2]}, {basket[3]} constituents, {basket[4]}% weight")
+            summary_count += 1
+        print(f"✅ Basket Summary Query: Found {summary_count} baskets")
+        
+        return True
+    
+    def _run_in_transaction(self, test, *args):
+        """Run one test in its own transaction, committing it only if the test passed"""
+        # _safe_test turns errors into a False/None result, so a failed test's partial writes
+        # are rolled back here; `with self.conn` still rolls back anything that escapes
+        with self.conn:
+            result = test(*args)
+            if not result:
+                self.conn.rollback()
+        return result
     
     def run_full_crud_test_suite(self) -> Dict[str, bool]:
         """Run the complete CRUD test suite"""
@@ -310,21 +373,21 @@ class DatabaseCRUDTester:
         
         try:
             # Test 1: READ operations
-            results['read_operations'] = self.test_read_operations()
+            results['read_operations'] = self._run_in_transaction(self.test_read_operations)
             
             # Test 2: CREATE operations
-            basket_id = self.test_create_operations()
+            basket_id = self._run_in_transaction(self.test_create_operations)
             results['create_operations'] = basket_id is not None
             
             if basket_id:
                 # Test 3: UPDATE operations
-                results['update_operations'] = self.test_update_operations(basket_id)
+                results['update_operations'] = self._run_in_transaction(self.test_update_operations, basket_id)
                 
                 # Test 4: DELETE operations
-                results['delete_operations'] = self.test_delete_operations(basket_id)
+                results['delete_operations'] = self._run_in_transaction(self.test_delete_operations, basket_id)
             
             # Test 5: Advanced queries
-            results['advanced_queries'] = self.test_advanced_queries()
+            results['advanced_queries'] = self._run_in_transaction(self.test_advanced_queries)
             
         finally:
             self.disconnect()
@@ -0,0 +1,61 @@
+"""
+Tests for the BULK_SEED_N COPY path of the database CRUD tester
+
+The row checks run offline against the constraints in the schema init script;
+set CRUD_TEST_DB_HOST to also COPY into a live database (rolled back afterwards).
+"""
+
+import csv
+import io
+import os
+import re
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+import test_database_crud as crud
+
+_SCHEMA = (Path(__file__).resolve().parent.parent / "database" / "init" / "02-basket-core-schema.sql").read_text()
+_COPY_COLUMNS = re.compile(r"COPY basket_constituents \((.*?)\) FROM STDIN", re.S)
+
+class _RecordingCursor:
+    """Cursor stand-in that keeps what copy_expert was asked to stream"""
+    
+    def copy_expert(self, sql, file):
+        self.sql = sql
+        self.payload = file.read()
+
+def _seed_rows(count):
+    tester = crud.DatabaseCRUDTester()
+    tester.cursor = _RecordingCursor()
+    tester._bulk_seed_constituents("00000000-0000-0000-0000-000000000001", count)
+    columns = [c.strip() for c in _COPY_COLUMNS.search(tester.cursor.sql).group(1).split(",")]
+    return [dict(zip(columns, row)) for row in csv.reader(io.StringIO(tester.cursor.payload))]
+
+def test_seed_rows_match_copy_columns():
+    rows = _seed_rows(25)
+    assert len(rows) == 25
+    assert all(len(row) == 9 for row in rows)
+    assert len({row["symbol"] for row in rows}) == 25
+
+def test_seed_rows_satisfy_schema_checks():
+    low, high = re.search(r"chk_weight CHECK \(weight > (\S+) AND weight <= (\S+)\)", _SCHEMA).groups()
+    symbol_pattern = re.search(r"chk_symbol CHECK \(symbol ~ '(.+?)'\)", _SCHEMA).group(1)
+    for row in _seed_rows(25):
+        assert Decimal(low) < Decimal(row["weight"]) <= Decimal(high)
+        assert re.match(symbol_pattern, row["symbol"])
+
+@pytest.mark.skipif(not os.environ.get("CRUD_TEST_DB_HOST"), reason="CRUD_TEST_DB_HOST not set")
+def test_create_operations_copies_seed_rows(monkeypatch):
+    monkeypatch.setattr(crud, "_BULK_SEED_N", 50)
+    tester = crud.DatabaseCRUDTester(host=os.environ["CRUD_TEST_DB_HOST"])
+    assert tester.connect()
+    try:
+        basket_id = tester.test_create_operations()
+        assert basket_id is not None
+        tester.cursor.execute("SELECT constituent_count FROM baskets WHERE id = %s", (basket_id,))
+        assert tester.cursor.fetchone()[0] == 52
+    finally:
+        tester.conn.rollback()
+        tester.disconnect()